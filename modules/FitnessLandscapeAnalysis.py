@@ -1,15 +1,15 @@
 import numpy as np
 import pandas as pd
 from tqdm import tqdm
-from collections import deque
 import random
 import os
 import csv
 import json
 from scipy import stats
+from scipy.spatial.distance import pdist
 from matplotlib import pyplot as plt
 from modules import util
-from config.Edge import Edge
+from modules import kernels
 
 class FitnessLandscapeAnalysis:
     """
@@ -23,6 +23,7 @@ class FitnessLandscapeAnalysis:
         _file_path (String): location where data will be saved
         _size (int): number of solution candidates
         _edges (set of Strings): set of edges to choose from
+        _fits_q (np.ndarray): integer-quantized fitnesses for the neutrality tests, None unless fit_decimals is given
     
     Methods:
         get_fits(): returns the fitnesses of the fitness landscape
@@ -43,7 +44,7 @@ class FitnessLandscapeAnalysis:
         strong_baisns(weak_basins_dict): returns all the strong basins (architectures who have a strictly increasing path uniquely to one target architecture)
     """
 
-    def __init__(self, fits, genotypes, phenotypes, file_path, edges={Edge.NONE, Edge.CONV_1X1, Edge.CONV_3X3, Edge.SKIP_CONNECT, Edge.AVG_POOL_3X3}):
+    def __init__(self, fits, genotypes, phenotypes, file_path, edges=util.ALL_EDGES, nbr_table=None, fit_decimals=None):
         """
         Initialize a new instance of FitnessLandscapeAnalysis
 
@@ -53,15 +54,114 @@ class FitnessLandscapeAnalysis:
             phenotypes (list of strings): list of phenotypes (in our case, unique architecture strings)
             file_path (String): location where data will be saved
             edges (set of Strings): set of edges to choose from
-        """
-        self._fits = fits
+            nbr_table (numpy.ndarray, default None): precomputed neighbor index table, so analyses
+                of different fitness columns over the same search space can share one table
+            fit_decimals (int, default None): if given, the neutrality tests compare fitnesses
+                rounded to this many decimals (as integers) instead of exactly; note that the
+                NATS-Bench accuracies are averages over seeds, so rounding merges networks
+                whose underlying fitnesses genuinely differ
+        """
+        # keep fitnesses as one contiguous float32 array so the gather-heavy kernels
+        # touch half the memory of float64 and never go through pandas scalar access
+        self._fits = np.ascontiguousarray(np.asarray(fits, dtype=np.float32))
+        # integer fitness codes for the neutrality comparisons when quantizing
+        self._fits_q = None
+        if fit_decimals is not None:
+            self._fits_q = np.round(self._fits.astype(np.float64) * 10**fit_decimals).astype(np.int32)
         self._global_max = np.argmax(self._fits)
         self._genotypes = genotypes
         self._phenotypes = phenotypes
         self._file_path = file_path
         self._size = len(self._fits)
         self._edges = edges
-        
+        self._nbr_table = nbr_table
+        self._edge_codes = None
+        self._bfs_visited = None
+        self._bfs_queue = None
+        self._dists_to_global_max = None
+        self._nbr_fits = None
+        # results stashed by collect_data so run_analysis in the same process
+        # does not re-read the files it just wrote
+        self._maxima = None
+        self._weak_basins = None
+        self._strong_basins = None
+        self._neutral_nets = None
+        self._walks = None
+
+    def _get_nbr_table(self):
+        """
+        Lazily builds and caches the neighbor index table so every method that walks
+        the landscape shares one table instead of re-deriving neighbors per call
+
+        Parameters:
+            none
+        Returns:
+            (numpy.ndarray): table where row i contains the indices of the neighbors of architecture i
+        """
+        if self._nbr_table is None:
+            self._nbr_table = util.build_neighbor_table(self._genotypes, edges=self._edges)
+        return self._nbr_table
+
+    def _get_edge_codes(self):
+        """
+        Lazily builds and caches the int8 edge-code matrix of the genotypes for
+        vectorized Hamming distance computations
+
+        Parameters:
+            none
+        Returns:
+            (numpy.ndarray): int8 array of edge codes, one row per architecture
+        """
+        if self._edge_codes is None:
+            self._edge_codes = util.encode_edges(self._genotypes, edges=self._edges)
+        return self._edge_codes
+
+    def _get_nbr_fits(self):
+        """
+        Lazily gathers and caches the fitnesses of every architecture's neighbors,
+        aligned with the neighbor table, so boundary and maxima scans read one
+        contiguous float32 block instead of re-gathering per call
+
+        Parameters:
+            none
+        Returns:
+            (numpy.ndarray): float32 array of shape (num architectures, num neighbors)
+        """
+        if self._nbr_fits is None:
+            self._nbr_fits = self._fits[self._get_nbr_table()]
+        return self._nbr_fits
+
+    def _neutral_fits(self):
+        """
+        Returns the fitness array the neutrality tests should compare on: the
+        integer-quantized codes when fit_decimals was given, the exact float
+        fitnesses otherwise
+
+        Parameters:
+            none
+        Returns:
+            (numpy.ndarray): fitness values used for the equal-fitness tests
+        """
+        if self._fits_q is not None:
+            return self._fits_q
+        return self._fits
+
+    def _get_bfs_bufs(self):
+        """
+        Lazily allocates the visited mask and queue buffer shared by the BFS kernels,
+        so repeated basin/neutral-net traversals do not reallocate per call
+
+        Parameters:
+            none
+        Returns:
+            (tuple of numpy.ndarray): (visited bool mask, int32 queue buffer)
+        """
+        if self._bfs_visited is None:
+            self._bfs_visited = np.zeros(self._size, dtype=np.bool_)
+            self._bfs_queue = np.empty(self._size, dtype=np.int32)
+        return self._bfs_visited, self._bfs_queue
+
+
     def get_fits(self):
         """
         Gets the fitnesses of the fitness landscape
@@ -82,7 +182,12 @@ class FitnessLandscapeAnalysis:
         Returns:
             (numpy.ndarray): array of distances to the global optimum
         """
-        return util.dists_to_arch(self._genotypes, self._global_max)
+        if self._dists_to_global_max is None:
+            # Hamming distance of every row of the edge-code matrix to the optimum's row,
+            # cached since correlations and the visualizations both ask for it
+            codes = self._get_edge_codes()
+            self._dists_to_global_max = (codes != codes[self._global_max]).sum(axis=1)
+        return self._dists_to_global_max
 
     def get_global_max(self):
         """
@@ -104,11 +209,13 @@ class FitnessLandscapeAnalysis:
             none
         """
         os.makedirs(f"{self._file_path}/data", exist_ok=True)
-        maxima = self.local_maxima(save=True)
-        weak_basins = self.weak_basins(maxima, save=True)
-        self.strong_basins(weak_basins, save=True)
-        self.neutral_nets(save=True)
-        self.random_walks(save=True)
+        # keep everything on the instance as well so a run_analysis in the same
+        # process reads the results from memory instead of from disk
+        self._maxima = self.local_maxima(save=True)
+        self._weak_basins = self.weak_basins(self._maxima, save=True)
+        self._strong_basins = self.strong_basins(self._weak_basins, save=True)
+        self._neutral_nets = self.neutral_nets(save=True)
+        self._walks = self.random_walks(save=True)
 
     def run_analysis(self):
         """
@@ -120,107 +227,131 @@ class FitnessLandscapeAnalysis:
             (object) object containing metrics analysis
         """
         # ========== DENSITY OF STATES ==========
-        max_fitness = self._fits[self._global_max]
-        fitness_diffs_from_max = np.array(self._fits) - max_fitness
-        avg_fitness_diff_from_max = np.average(fitness_diffs_from_max)
+        max_fitness = float(self._fits[self._global_max])
+        fitness_diffs_from_max = self._fits - max_fitness
+        avg_fitness_diff_from_max = float(np.average(fitness_diffs_from_max))
 
         # ========== CORRELATIONS ==========
         corrs = self.correlations()
 
         # ========== LOCAL MAXIMA ==========
-        with open(f"{self._file_path}/data/local_maxima.csv") as local_max_f:
-            local_maxima = [int(i) for i in list(next(csv.reader(local_max_f)))]
-        maxima_genotypes = [self._genotypes[i] for i in local_maxima]
-        maxima_dists = [util.edit_distance(genotype, self._genotypes[self._global_max]) for genotype in maxima_genotypes]
-        maxima_fits = [self._fits[i] for i in local_maxima]
+        if self._maxima is not None:
+            local_maxima = self._maxima
+        else:
+            with open(f"{self._file_path}/data/local_maxima.csv") as local_max_f:
+                local_maxima = [int(i) for i in list(next(csv.reader(local_max_f)))]
+        # the cached distance vector already holds every architecture's distance
+        # to the global maximum, so the maxima distances are one gather
+        maxima_dists = self.get_dists_to_global_max()[local_maxima]
+        # gather the maxima fitnesses in one indexing operation instead of per-scalar reads
+        maxima_fits = self._fits[local_maxima]
 
         # ========== BASINS OF ATTRACTION ==========
         # ---------- WEAK BASINS ----------
         weak_basins = dict()
-        weak_basin_sizes = []
-        in_weak_basin = set()
-        global_max_weak_basin_size = None
-        for i in local_maxima:
-            with open(f"{self._file_path}/data/weak_basins/local_max_{i}_weak_basin.csv") as weak_basin_f:
-                weak_basin = list(next(csv.reader(weak_basin_f)))
-                weak_basins[i] = weak_basin
-                weak_basin_sizes.append(len(weak_basin))
-                in_weak_basin.update(weak_basin)
-                if i == self._global_max:
-                    global_max_weak_basin_size = len(weak_basin)
+        if self._weak_basins is not None:
+            weak_basins = {max_i: np.fromiter(basin, dtype=np.int64, count=len(basin))
+                           for max_i, basin in self._weak_basins.items()}
+        elif os.path.exists(f"{self._file_path}/data/weak_basins.npz"):
+            # a single archive load replaces one open/parse cycle per maximum
+            with np.load(f"{self._file_path}/data/weak_basins.npz") as weak_basins_f:
+                weak_basins = {int(max_i): weak_basins_f[max_i] for max_i in weak_basins_f.files}
+        else:
+            # data collected before the switch to binary storage is one csv per maximum
+            for i in local_maxima:
+                with open(f"{self._file_path}/data/weak_basins/local_max_{i}_weak_basin.csv") as weak_basin_f:
+                    weak_basins[i] = np.asarray(next(csv.reader(weak_basin_f)), dtype=int)
+        # keep the sizes aligned with the maxima order for the size/fitness correlations
+        weak_basin_sizes = [len(weak_basins[i]) for i in local_maxima]
+        in_weak_basin = np.zeros(self._size, dtype=bool)
+        for weak_basin in weak_basins.values():
+            in_weak_basin[weak_basin] = True
+        global_max_weak_basin_size = len(weak_basins[self._global_max])
 
         # ---------- STRONG BASINS ----------
         strong_basins = dict()
-        strong_basin_sizes = []
-        in_strong_basin = set()
-        global_max_strong_basin_size = None
-        for strong_basin_f_name in os.listdir(f"{self._file_path}/data/strong_basins"):
-            with open(f"{self._file_path}/data/strong_basins/{strong_basin_f_name}") as strong_basin_f:
-                local_max = int(strong_basin_f_name[10: -17])
-                strong_basin = list(next(csv.reader(strong_basin_f)))
-                # only count the basins that are not empty
-                if len(strong_basin) > 0:
-                    # store strong basin in a dictionary corresponding to its optimum
-                    strong_basins[local_max] = strong_basin
-                    # keep track of strong basin sizes
-                    strong_basin_sizes.append(len(strong_basin))
-                    # keep track of which architectures appear in a strong basin
-                    in_strong_basin.update(strong_basin)
-                    if local_max == self._global_max:
-                        global_max_strong_basin_size = len(strong_basin)
+        if self._strong_basins is not None:
+            strong_basins = {max_i: np.fromiter(basin, dtype=np.int64, count=len(basin))
+                             for max_i, basin in self._strong_basins.items() if len(basin) > 0}
+        elif os.path.exists(f"{self._file_path}/data/strong_basins.npz"):
+            with np.load(f"{self._file_path}/data/strong_basins.npz") as strong_basins_f:
+                for max_i in strong_basins_f.files:
+                    strong_basin = strong_basins_f[max_i]
+                    # only count the basins that are not empty
+                    if len(strong_basin) > 0:
+                        strong_basins[int(max_i)] = strong_basin
+        else:
+            for strong_basin_f_name in os.listdir(f"{self._file_path}/data/strong_basins"):
+                with open(f"{self._file_path}/data/strong_basins/{strong_basin_f_name}") as strong_basin_f:
+                    local_max = int(strong_basin_f_name[10: -17])
+                    strong_basin = list(next(csv.reader(strong_basin_f)))
+                    # only count the basins that are not empty
+                    if len(strong_basin) > 0:
+                        strong_basins[local_max] = np.asarray(strong_basin, dtype=int)
+        strong_basin_sizes = [len(strong_basin) for strong_basin in strong_basins.values()]
+        in_strong_basin = np.zeros(self._size, dtype=bool)
+        for strong_basin in strong_basins.values():
+            in_strong_basin[strong_basin] = True
+        global_max_strong_basin_size = len(strong_basins[self._global_max]) if self._global_max in strong_basins else None
 
         # ========== NEUTRALITY ==========
         neutral_nets = []
+        if self._neutral_nets is not None:
+            neutral_nets = [np.fromiter(net, dtype=np.int64, count=len(net)) for net in self._neutral_nets]
+        elif os.path.exists(f"{self._file_path}/data/neutral_networks.npz"):
+            with np.load(f"{self._file_path}/data/neutral_networks.npz") as neutral_nets_f:
+                neutral_nets = [neutral_nets_f[name] for name in neutral_nets_f.files]
+        else:
+            # data collected before the switch to binary storage is csv
+            with open(f"{self._file_path}/data/neutral_networks.csv", newline='') as neutral_nets_f:
+                for neutral_net_l in csv.reader(neutral_nets_f):
+                    # reader will read strings, we want ints
+                    neutral_nets.append([int(i) for i in neutral_net_l])
+
 
-        # Open the CSV file and read its contents
-        with open(f"{self._file_path}/data/neutral_networks.csv", newline='') as neutral_nets_f:
-            for neutral_net_l in csv.reader(neutral_nets_f):
-                # reader will read strings, we want ints
-                neutral_net = [int(i) for i in neutral_net_l]
-                neutral_nets.append(neutral_net)
-    
         # get the fitness of each neutral net, since the neutral nets all have the same fitness can just take first architecture
         neutral_net_sizes = [len(net) for net in neutral_nets]
 
         # ---------- LARGEST NEUTRAL NETWORK ----------
-        largest_neutral_net = neutral_nets[np.argmax(neutral_net_sizes)]
-        largest_neutral_net_unique_phenotypes = set()
-        largest_neutral_net_unique_nbr_genotypes = set()
-        largest_neutral_net_unique_nbr_phenotypes = set()
-        largest_neutral_net_unique_nbr_fits = set()
-        largest_neutral_net_edit_dists = []
-        for arch_i in largest_neutral_net:
-            largest_neutral_net_unique_phenotypes.add(self._phenotypes[arch_i])
-            # get all unique genotypes, phenotypes, and fitnesses of neighbors
-            for nbr_i in util.nbrs(self._genotypes, arch_i):
-                # do not add neighbors already in the neutral network
-                if nbr_i not in largest_neutral_net:
-                    largest_neutral_net_unique_nbr_genotypes.add(self._genotypes[nbr_i])
-                    largest_neutral_net_unique_nbr_phenotypes.add(self._phenotypes[nbr_i])
-                    largest_neutral_net_unique_nbr_fits.add(self._fits[nbr_i])
-        # get all the edit distances between members of neutral network
-        for i in range(len(largest_neutral_net)):
-            for j in range(i + 1, len(largest_neutral_net)):
-                arch_i_str = self._genotypes[i]
-                arch_j_str = self._genotypes[j]
-                largest_neutral_net_edit_dists.append(util.edit_distance(arch_i_str, arch_j_str))
-        largest_neutral_net_max_edit_distance = max(largest_neutral_net_edit_dists)
-        largest_neutral_net_avg_edit_distance = sum(largest_neutral_net_edit_dists) / len(largest_neutral_net_edit_dists)
-        largest_neutral_net_fit = self._fits[largest_neutral_net[0]]
+        largest_neutral_net = np.asarray(neutral_nets[np.argmax(neutral_net_sizes)], dtype=int)
+        largest_neutral_net_unique_phenotypes = set(self._phenotypes[largest_neutral_net])
+        # gather the neighbor rows of all members at once and keep only the
+        # neighbors outside the network, then take uniques in bulk
+        member = np.zeros(self._size, dtype=bool)
+        member[largest_neutral_net] = True
+        all_nbrs = self._get_nbr_table()[largest_neutral_net].ravel()
+        outside_nbrs = all_nbrs[~member[all_nbrs]]
+        largest_neutral_net_unique_nbr_genotypes = np.unique(np.asarray(self._genotypes)[outside_nbrs])
+        largest_neutral_net_unique_nbr_phenotypes = np.unique(np.asarray(self._phenotypes)[outside_nbrs])
+        largest_neutral_net_unique_nbr_fits = np.unique(self._fits[outside_nbrs])
+        # all pairwise edit distances between members of the neutral network are
+        # one Hamming pdist over their edge codes (the old loop also indexed the
+        # genotype list with positions within the net instead of the members)
+        net_codes = self._get_edge_codes()[np.asarray(largest_neutral_net, dtype=int)]
+        largest_neutral_net_edit_dists = pdist(net_codes, metric="hamming") * net_codes.shape[1]
+        largest_neutral_net_max_edit_distance = int(largest_neutral_net_edit_dists.max())
+        largest_neutral_net_avg_edit_distance = float(largest_neutral_net_edit_dists.mean())
+        largest_neutral_net_fit = float(self._fits[largest_neutral_net[0]])
         
         # ========== RUGGEDNESS ==========
-        random_walks = []
         autocorrs = dict()
-        with open(f"{self._file_path}/data/200_random_length_100_walks.csv", newline='') as random_walks_f:
-            for random_walk in csv.reader(random_walks_f):
-                random_walks.append(random_walk)
+        walks_path = f"{self._file_path}/data/200_random_length_100_walks"
+        if self._walks is not None:
+            random_walks = self._walks
+        elif os.path.exists(f"{walks_path}.npy"):
+            random_walks = np.load(f"{walks_path}.npy")
+        else:
+            # data collected before the switch to binary storage is still csv
+            with open(f"{walks_path}.csv", newline='') as random_walks_f:
+                random_walks = [random_walk for random_walk in csv.reader(random_walks_f)]
+        # one (trials, walk_len) fitness matrix serves every lag
+        walk_fits = self._fits[np.asarray(random_walks, dtype=int)].astype(np.float64)
         for lag in range(1, 21):
-            autocorrs_specific_lag = []
-            for random_walk in random_walks:
-                walk_fits = [self._fits[int(i)] for i in random_walk]
-                autocorr_specific_walk = stats.pearsonr(walk_fits[:-lag], walk_fits[lag:])[0]
-                autocorrs_specific_lag.append(autocorr_specific_walk)
-            autocorrs[lag] = sum(autocorrs_specific_lag)/len(autocorrs_specific_lag)
+            # row-wise Pearson between each walk and its lag-shifted self
+            a = walk_fits[:, :-lag] - walk_fits[:, :-lag].mean(axis=1, keepdims=True)
+            b = walk_fits[:, lag:] - walk_fits[:, lag:].mean(axis=1, keepdims=True)
+            autocorrs_per_walk = (a * b).sum(axis=1) / np.sqrt((a * a).sum(axis=1) * (b * b).sum(axis=1))
+            autocorrs[lag] = autocorrs_per_walk.mean()
         
 
         summary = {
@@ -236,12 +367,12 @@ class FitnessLandscapeAnalysis:
             "localMaximaKendallTau": stats.kendalltau(maxima_dists, maxima_fits),
             "numWeakBasins": len(weak_basins),
             "avgWeakBasinSize": sum(weak_basin_sizes)/len(weak_basins),
-            "weakBasinExtent": len(in_weak_basin)/self._size,
+            "weakBasinExtent": int(in_weak_basin.sum())/self._size,
             "fitnessWeakBasinSizePearsonr": stats.pearsonr(maxima_fits, weak_basin_sizes),
             "globalMaxWeakBasinExtent": global_max_weak_basin_size/self._size,
             "numStrongBasins": len(strong_basins),
             "avgStrongBasinSize": sum(strong_basin_sizes)/len(strong_basins),
-            "strongBasinExtent": len(in_strong_basin)/self._size,
+            "strongBasinExtent": int(in_strong_basin.sum())/self._size,
             "globalMaxStrongBasinExtent": global_max_strong_basin_size/self._size,
             "numNeutralNets": len(neutral_nets),
             "avgNeutralNetSize": sum(neutral_net_sizes)/len(neutral_nets),
@@ -333,7 +464,7 @@ class FitnessLandscapeAnalysis:
             (dict): dictionary of different correlation values
         """
         # distances are to the fittest architecture
-        dists = util.dists_to_arch(self._genotypes, self._global_max)
+        dists = self.get_dists_to_global_max()
         FDC = stats.pearsonr(self._fits, dists) # same as Pearson's correlation
         spearman = stats.spearmanr(self._fits, dists)
         kendall = stats.kendalltau(self._fits, dists)
@@ -353,19 +484,9 @@ class FitnessLandscapeAnalysis:
         Returns:
             (set of ints): indices corresponding to a neutral network around the starting architecture
         """
-        q = deque([start_i])
-        visited = {start_i}
-        net = {start_i}
-        while q:
-            curr_i = q.popleft()
-            nbrs = util.nbrs(self._genotypes, curr_i, edges=self._edges)
-            for nbr_i in nbrs:
-                # only explore neighbors that have the same fitness as the current architecture
-                if nbr_i not in visited and self._fits[nbr_i] == self._fits[curr_i]:
-                    visited.add(nbr_i)
-                    net.add(nbr_i)
-                    q.append(nbr_i)
-        return net
+        visited, queue = self._get_bfs_bufs()
+        net = kernels.bfs_neutral(start_i, self._neutral_fits(), self._get_nbr_table(), visited, queue)
+        return set(net.tolist())
 
     def neutral_nets(self, save=True):
         """
@@ -377,22 +498,17 @@ class FitnessLandscapeAnalysis:
         Returns:
             (list of set of ints): list of neutral networks of the search space
         """
-        nets = []
-        visited = set()
-        # do bfs starting from each architecture to search for neutral networks
-        for i in tqdm(range(len(self._fits))):
-            # bfs should find an entire network at once, so no need to revisit a node that is already in a network
-            if i not in visited:
-                net = self.neutral_net_bfs(i)
-                visited = visited | net
-                if len(net) > 1:
-                    nets.append(net)
+        # one union-find sweep over equal-fitness edges discovers every network at once
+        roots = kernels.neutral_union_find(self._neutral_fits(), self._get_nbr_table())
+        order = np.argsort(roots, kind="stable")
+        # architectures with the same root are contiguous after sorting, so split at the boundaries
+        boundaries = np.nonzero(np.diff(roots[order]))[0] + 1
+        groups = [group for group in np.split(order, boundaries) if len(group) > 1]
         if save:
-            with open(f"{self._file_path}/data/neutral_networks.csv", "w", newline="") as f:
-                csv_writer = csv.writer(f)
-                for net in nets:
-                    csv_writer.writerow(net)
-        return nets
+            # one ragged binary archive instead of per-int text formatting
+            np.savez(f"{self._file_path}/data/neutral_networks.npz",
+                     **{str(i): group.astype(np.int32) for i, group in enumerate(groups)})
+        return [set(group.tolist()) for group in groups]
 
     def percolation_index(self, net):
         """
@@ -404,15 +520,14 @@ class FitnessLandscapeAnalysis:
         Returns:
             (int): percolation index (number of unique neighboring fitness values)
         """
-        # gets the number of different fitness values surrounding the neutral area
-        values = set()
-        # go through all neighbors of all architectures and record their fitness values
-        for arch_i in net:
-            for nbr_i in util.nbrs(self._genotypes, arch_i, edges=self._edges):
-                # do not add the fitness of the neutral net
-                if nbr_i not in net:
-                    values.add(self._fits[nbr_i])
-        return len(values)
+        # gather the neighbor rows of every member at once and mask out the members
+        # themselves, leaving only the boundary around the neutral area
+        net_arr = np.fromiter(net, dtype=np.int64, count=len(net))
+        member = np.zeros(self._size, dtype=bool)
+        member[net_arr] = True
+        nbrs = self._get_nbr_table()[net_arr].ravel()
+        # the percolation index is the number of different fitness values on the boundary
+        return len(np.unique(self._get_nbr_fits()[net_arr].ravel()[~member[nbrs]]))
 
     def neutral_nets_analysis(self):
         """
@@ -431,15 +546,12 @@ class FitnessLandscapeAnalysis:
             # convert neutral net to a list so it can be indexed to find the fitness of the neutral net
             net_list = list(net)
             net_fit = self._fits[net_list[0]]
-            net_strs = [self._genotypes[arch_i] for arch_i in net_list]
-            dists = []
-
-            # calculate edit distance between all pairs of architectures in the neutral net
-            for i in range(len(net_strs)):
-                for j in range(i + 1, len(net_strs)):
-                    dists.append(util.edit_distance(net_strs[i], net_strs[j]))  
-            max_dist = max(dists)
-            avg_dist = sum(dists)/len(dists)      
+            # the edit distances between all pairs in the net are one Hamming pdist
+            # over the encoded edge codes
+            net_codes = self._get_edge_codes()[net_list]
+            dists = pdist(net_codes, metric="hamming") * net_codes.shape[1]
+            max_dist = dists.max()
+            avg_dist = dists.mean()
 
             net_info = {
                 "Size": len(net),
@@ -451,38 +563,23 @@ class FitnessLandscapeAnalysis:
             nets_info.append(net_info)
         return nets_info
 
-    def local_maxima(self, save=True):
+    def local_maxima(self, save=True, top_k=None):
         """
         Returns a list of indices corresponding to local maxima in the search space
 
         Parameters:
             save (boolean, deafult True): determines whether or not to save the local max data
+            top_k (int, default None): if given, only return the top_k fittest local maxima
         
         Returns:
             (list of ints): indices corresponding to local maxima in the search space
         """
-        visited = set()
-        maxima = []
-        # iterate through all architectures
-        for i in tqdm(range(self._size)):
-            if i not in visited:
-                # create a flag for if the architecture is a maximum or not
-                local_max = True
-                nbrs = util.nbrs(self._genotypes, i, edges=self._edges)
-                visited.add(i)
-                # for each neighbor, check if fitness is less than current architecture
-                for nbr_i in nbrs:
-                    # if the neighbor is at least as fit as the current architecture,
-                    # the current architecture cannot be a local max
-                    if self._fits[nbr_i] >= self._fits[i]:
-                        local_max = False
-                    # if the neighbor is at most as fit as the current architecture,
-                    # the neighbor cannot be a local max
-                    elif self._fits[nbr_i] <= self._fits[i]:
-                        visited.add(nbr_i)
-                # if all the neighbors are less fit, then the current architecture is a local maximum
-                if local_max:
-                    maxima.append(i)
+        # an architecture is a local maximum when all of its neighbors are strictly less fit
+        maxima = np.nonzero(self._get_nbr_fits().max(axis=1) < self._fits)[0]
+        if top_k is not None and top_k < len(maxima):
+            # argpartition selects the k fittest maxima without a full sort
+            maxima = maxima[np.argpartition(self._fits[maxima], -top_k)[-top_k:]]
+        maxima = maxima.tolist()
         if save:
             with open(f"{self._file_path}/data/local_maxima.csv", "w", newline="") as f:
                 csv.writer(f).writerow(maxima)
@@ -500,13 +597,13 @@ class FitnessLandscapeAnalysis:
             (list of ints): indices of a random walk in the search space
         """
         # start a random walk at the given starting architecture for the given walk length
+        nbr_table = self._get_nbr_table()
         curr_i = start_i
         walk = [curr_i]
         for i in range(walk_len - 1):
-            # choose random neighbor index
-            rand_nbr_i = random.choice(util.nbrs(self._genotypes, curr_i, edges=self._edges))
-            walk.append(rand_nbr_i)
-            curr_i = rand_nbr_i
+            # hop to the neighbor in a random column of the current row
+            curr_i = int(nbr_table[curr_i, random.randrange(nbr_table.shape[1])])
+            walk.append(curr_i)
         return walk
     
     def random_walks(self, trials=200, walk_len=100, save=True):
@@ -518,13 +615,12 @@ class FitnessLandscapeAnalysis:
             walk_len (int, default 100): walk length
             save (boolean, default True): determines whether or not to save the random walk data
         """
-        walks = np.empty((200, 100), dtype=int)
-        for i in tqdm(range(trials)):
-            start_i = random.randint(0, self._size-1)
-            walk = self.random_walk(start_i, walk_len)
-            walks[i] = walk
+        # derive one seed per walk so the parallel kernel is reproducible
+        seeds = np.array([random.randrange(2**31) for unused_i in range(trials)], dtype=np.int64)
+        walks = kernels.random_walks(self._get_nbr_table(), seeds, walk_len)
         if save:
-            np.savetxt(f"{self._file_path}/data/{trials}_random_length_{walk_len}_walks.csv", walks, delimiter=",", fmt="%d")
+            # store the walks in binary so neither side pays int/text conversion
+            np.save(f"{self._file_path}/data/{trials}_random_length_{walk_len}_walks.npy", walks)
         return walks
 
 
@@ -538,20 +634,9 @@ class FitnessLandscapeAnalysis:
         Returns:
             (set of ints): weak basin (set of architectures with a strictly increasing path)
         """
-        q = deque([start_i])
-        visited = {start_i}
-        basin = set()
-
-        while q:
-            curr_i = q.popleft()
-            nbrs = util.nbrs(self._genotypes, curr_i, edges=self._edges)
-            for nbr_i in nbrs:
-                # add neighbors who are no better than current architecture
-                if nbr_i not in visited and self._fits[nbr_i] <= self._fits[curr_i]:
-                    visited.add(nbr_i)
-                    basin.add(nbr_i)
-                    q.append(nbr_i)
-        return basin
+        visited, queue = self._get_bfs_bufs()
+        basin = kernels.bfs_basin(start_i, self._fits, self._get_nbr_table(), visited, queue)
+        return set(basin.tolist())
 
     def weak_basins(self, maxima, save=True):
         """
@@ -564,14 +649,15 @@ class FitnessLandscapeAnalysis:
         Returns:
             (dict): dictionary of weak basins where the key is the index of a local max and the value is the corresponding weak basin
         """
+        # all basin traversals are independent, so run them in one parallel kernel
+        in_basin = kernels.all_weak_basins(self._fits, self._get_nbr_table(), np.asarray(maxima, dtype=np.int64))
         basins = dict()
-        for max_i in tqdm(maxima):
-            basin = self.weak_basin(max_i)
-            basins[max_i] = basin
-            if save:
-                os.makedirs(f"{self._file_path}/data/weak_basins", exist_ok=True)
-                with open(f"{self._file_path}/data/weak_basins/local_max_{max_i}_weak_basin.csv", "w", newline="") as f:
-                    csv.writer(f).writerow(list(basin))
+        for t, max_i in enumerate(maxima):
+            basins[max_i] = set(np.nonzero(in_basin[t])[0].tolist())
+        if save:
+            # one binary archive keyed by maximum instead of one csv file per basin
+            np.savez(f"{self._file_path}/data/weak_basins.npz",
+                     **{str(max_i): np.fromiter(basin, dtype=np.int32, count=len(basin)) for max_i, basin in basins.items()})
         return basins
 
     def strong_basins(self, weak_basins_dict, save=True):
@@ -585,20 +671,17 @@ class FitnessLandscapeAnalysis:
         Returns:
             (dict): dictionary of strong basins where the key is the index of a local max and the value is the corresponding strong basin
         """
-        # given a dictionary of weak basins of optima, find the strong basins of the corresponding optima
-        basins = weak_basins_dict.values()
-        not_unique = set()
-        # get all of the archs that appear in more than one weak basin
-        for basin1 in basins:
-            for basin2 in basins:
-                if basin1 != basin2:
-                    not_unique.update(basin1 & basin2)
+        # count how many weak basins each architecture appears in; anything counted
+        # twice is shared between optima and cannot be in a strong basin
+        basin_counts = np.zeros(self._size, dtype=np.int32)
+        for basin in weak_basins_dict.values():
+            basin_counts[np.fromiter(basin, dtype=np.int64, count=len(basin))] += 1
+        not_unique = set(np.nonzero(basin_counts >= 2)[0].tolist())
         strong_basins_dict = dict()
         for opt in weak_basins_dict.keys():
-            strong_basin = weak_basins_dict[opt] - not_unique
-            strong_basins_dict[opt] = strong_basin
-            if save:
-                os.makedirs(f"{self._file_path}/data/strong_basins", exist_ok=True)
-                with open(f"{self._file_path}/data/strong_basins/local_max_{opt}_strong_basin.csv", "w", newline="") as f:
-                    csv.writer(f).writerow(list(strong_basin))
+            strong_basins_dict[opt] = weak_basins_dict[opt] - not_unique
+        if save:
+            # one binary archive keyed by maximum instead of one csv file per basin
+            np.savez(f"{self._file_path}/data/strong_basins.npz",
+                     **{str(opt): np.fromiter(basin, dtype=np.int32, count=len(basin)) for opt, basin in strong_basins_dict.items()})
         return strong_basins_dict
\ No newline at end of file
@@ -0,0 +1,54 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from modules import util
+from modules.data_cache import load_nats_bench
+from modules.FitnessLandscapeAnalysis import FitnessLandscapeAnalysis
+
+# search spaces analyzed in the paper, keyed by output folder
+SEARCH_SPACES = {
+    "CIFAR10": "CIFAR10TestAccuracy200Epochs",
+    "CIFAR100": "CIFAR100TestAccuracy200Epochs",
+    "ImageNet": "ImageNetTestAccuracy200Epochs",
+}
+
+def analyze_space(file_path, collect=False):
+    """
+    Runs the fitness landscape analysis of a single search space
+
+    Parameters:
+        file_path (String): output folder of the search space, must be a key of SEARCH_SPACES
+        collect (boolean, default False): determines whether or not to regenerate the saved
+            maxima/basin/neutral-net/walk data before the analysis
+
+    Returns:
+        none
+    """
+    random.seed(0)
+    df = load_nats_bench()
+    # hand the columns over as numpy arrays; copying them into Python lists
+    # only adds object churn
+    genotypes = df["ArchitectureString"].to_numpy()
+    phenotypes = df["UniqueString"].to_numpy()
+    # the neighbor table is identical for every search space, so persist it once on disk
+    nbr_table = util.build_neighbor_table(genotypes, cache_path="nats_bench_nbr_table.npz")
+    FLA = FitnessLandscapeAnalysis(df[SEARCH_SPACES[file_path]], genotypes, phenotypes, file_path, nbr_table=nbr_table)
+    if collect:
+        FLA.collect_data()
+    FLA.run_analysis()
+
+def analyze_all(collect=False):
+    """
+    Runs the analyses of all search spaces in parallel, one worker process per
+    search space, since they are fully independent of each other
+
+    Parameters:
+        collect (boolean, default False): determines whether or not to regenerate the saved
+            data of each search space before its analysis
+
+    Returns:
+        none
+    """
+    with ProcessPoolExecutor(max_workers=len(SEARCH_SPACES)) as executor:
+        # consume the iterator so worker exceptions surface here
+        list(executor.map(partial(analyze_space, collect=collect), SEARCH_SPACES))
@@ -0,0 +1,33 @@
+import os
+import numpy as np
+import pandas as pd
+
+def load_nats_bench(csv_path="nats_bench.csv"):
+    """
+    Loads the NATS-Bench table, going through a binary .npz sidecar cache so
+    repeat runs skip the CSV parse. The cache is written next to the csv on the
+    first load and is rebuilt automatically whenever the csv is newer.
+
+    Parameters:
+        csv_path (String, default "nats_bench.csv"): location of the NATS-Bench csv
+
+    Returns:
+        (pandas.DataFrame): the NATS-Bench table, with fitness columns as float32
+    """
+    cache_path = os.path.splitext(csv_path)[0] + ".npz"
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(csv_path):
+        with np.load(cache_path) as cache:
+            return pd.DataFrame({name: cache[name] for name in cache.files})
+    df = pd.read_csv(csv_path)
+    columns = dict()
+    for col in df.columns:
+        arr = df[col].to_numpy()
+        # store fitness columns compactly; string columns stay as unicode arrays
+        if arr.dtype == np.float64:
+            arr = arr.astype(np.float32)
+        elif arr.dtype == object:
+            arr = arr.astype(str)
+        columns[col] = arr
+        df[col] = arr
+    np.savez(cache_path, **columns)
+    return df
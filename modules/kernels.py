@@ -0,0 +1,201 @@
+"""
+Numba kernels for the hot landscape traversals. Every kernel is compiled with
+cache=True so the machine code is persisted to disk on first use and later
+runs (including the short per-search-space worker processes) load it instead
+of paying JIT compilation again.
+"""
+import numpy as np
+from numba import njit, prange
+
+@njit(cache=True)
+def bfs_neutral(start_i, fits, nbr_table, visited, queue):
+    """
+    Collects the neutral network around a starting architecture with a BFS over
+    the neighbor index table, compiled to native code so the traversal pays no
+    per-edge interpreter cost.
+
+    Parameters:
+        start_i (int): index of starting architecture
+        fits (numpy.ndarray): array of fitnesses
+        nbr_table (numpy.ndarray): table where row i contains the indices of the neighbors of architecture i
+        visited (numpy.ndarray): preallocated bool mask, cleared here and reused across calls
+        queue (numpy.ndarray): preallocated int32 queue, doubles as the output buffer
+
+    Returns:
+        (numpy.ndarray): indices of the neutral network around the starting architecture
+    """
+    # clear the shared mask instead of allocating a fresh one per call
+    visited[:] = False
+    visited[start_i] = True
+    queue[0] = start_i
+    head = 0
+    tail = 1
+    while head < tail:
+        curr_i = queue[head]
+        head += 1
+        for k in range(nbr_table.shape[1]):
+            nbr_i = nbr_table[curr_i, k]
+            # only explore neighbors that have the same fitness as the current architecture
+            if not visited[nbr_i] and fits[nbr_i] == fits[curr_i]:
+                visited[nbr_i] = True
+                queue[tail] = nbr_i
+                tail += 1
+    return queue[:tail]
+
+@njit(cache=True, parallel=True)
+def random_walks(nbr_table, seeds, walk_len):
+    """
+    Performs one random walk per seed, with the independent walks spread across
+    cores via prange. Each thread seeds its own generator from the given seed so
+    runs are reproducible regardless of scheduling.
+
+    Parameters:
+        nbr_table (numpy.ndarray): table where row i contains the indices of the neighbors of architecture i
+        seeds (numpy.ndarray): one random seed per walk
+        walk_len (int): walk length
+
+    Returns:
+        (numpy.ndarray): int32 array of shape (len(seeds), walk_len) of walk indices
+    """
+    trials = seeds.shape[0]
+    walks = np.empty((trials, walk_len), dtype=np.int32)
+    for t in prange(trials):
+        np.random.seed(seeds[t])
+        curr_i = np.random.randint(0, nbr_table.shape[0])
+        walks[t, 0] = curr_i
+        for step in range(1, walk_len):
+            # choose a random neighbor index
+            curr_i = nbr_table[curr_i, np.random.randint(0, nbr_table.shape[1])]
+            walks[t, step] = curr_i
+    return walks
+
+@njit(cache=True, parallel=True)
+def all_weak_basins(fits, nbr_table, maxima):
+    """
+    Runs the weak-basin BFS of every local maximum, with the independent
+    traversals spread across cores via prange using thread-local scratch buffers.
+
+    Parameters:
+        fits (numpy.ndarray): array of fitnesses
+        nbr_table (numpy.ndarray): table where row i contains the indices of the neighbors of architecture i
+        maxima (numpy.ndarray): indices of the local maxima
+
+    Returns:
+        (numpy.ndarray): bool array of shape (len(maxima), len(fits)) where row t
+                         marks the members of the weak basin of maxima[t]
+    """
+    n = fits.shape[0]
+    in_basin = np.zeros((maxima.shape[0], n), dtype=np.bool_)
+    for t in prange(maxima.shape[0]):
+        visited = np.zeros(n, dtype=np.bool_)
+        queue = np.empty(n, dtype=np.int32)
+        start_i = maxima[t]
+        visited[start_i] = True
+        queue[0] = start_i
+        head = 0
+        tail = 1
+        while head < tail:
+            curr_i = queue[head]
+            head += 1
+            for k in range(nbr_table.shape[1]):
+                nbr_i = nbr_table[curr_i, k]
+                # add neighbors who are no better than the current architecture
+                if not visited[nbr_i] and fits[nbr_i] <= fits[curr_i]:
+                    visited[nbr_i] = True
+                    queue[tail] = nbr_i
+                    tail += 1
+        # the basin does not include the maximum itself
+        visited[start_i] = False
+        in_basin[t] = visited
+    return in_basin
+
+@njit(cache=True)
+def _find(parent, i):
+    """
+    Finds the union-find root of i with path compression.
+
+    Parameters:
+        parent (numpy.ndarray): union-find parent array
+        i (int): index to look up
+
+    Returns:
+        (int): root of the set containing i
+    """
+    root = i
+    while parent[root] != root:
+        root = parent[root]
+    # compress the path so later lookups are O(1)
+    while parent[i] != root:
+        nxt = parent[i]
+        parent[i] = root
+        i = nxt
+    return root
+
+@njit(cache=True)
+def neutral_union_find(fits, nbr_table):
+    """
+    Unions every pair of neighboring architectures with equal fitness in a single
+    pass over the neighbor table, so all neutral networks fall out of one sweep
+    instead of a BFS started from every architecture.
+
+    Parameters:
+        fits (numpy.ndarray): array of fitnesses
+        nbr_table (numpy.ndarray): table where row i contains the indices of the neighbors of architecture i
+
+    Returns:
+        (numpy.ndarray): int32 array mapping each architecture to the root of its neutral network
+    """
+    n = fits.shape[0]
+    parent = np.arange(n).astype(np.int32)
+    rank = np.zeros(n, dtype=np.int8)
+    for i in range(n):
+        for k in range(nbr_table.shape[1]):
+            nbr_i = nbr_table[i, k]
+            if fits[i] == fits[nbr_i]:
+                root_a = _find(parent, i)
+                root_b = _find(parent, nbr_i)
+                if root_a != root_b:
+                    # union by rank
+                    if rank[root_a] < rank[root_b]:
+                        root_a, root_b = root_b, root_a
+                    parent[root_b] = root_a
+                    if rank[root_a] == rank[root_b]:
+                        rank[root_a] += 1
+    # flatten so every architecture points directly at its root
+    for i in range(n):
+        parent[i] = _find(parent, i)
+    return parent
+
+@njit(cache=True)
+def bfs_basin(start_i, fits, nbr_table, visited, queue):
+    """
+    Collects the weak basin of a starting architecture (every architecture with a
+    strictly increasing path to it) with a BFS over the neighbor index table.
+
+    Parameters:
+        start_i (int): index of starting architecture
+        fits (numpy.ndarray): array of fitnesses
+        nbr_table (numpy.ndarray): table where row i contains the indices of the neighbors of architecture i
+        visited (numpy.ndarray): preallocated bool mask, cleared here and reused across calls
+        queue (numpy.ndarray): preallocated int32 queue, doubles as the output buffer
+
+    Returns:
+        (numpy.ndarray): indices of the weak basin, excluding the starting architecture
+    """
+    visited[:] = False
+    visited[start_i] = True
+    queue[0] = start_i
+    head = 0
+    tail = 1
+    while head < tail:
+        curr_i = queue[head]
+        head += 1
+        for k in range(nbr_table.shape[1]):
+            nbr_i = nbr_table[curr_i, k]
+            # add neighbors who are no better than the current architecture
+            if not visited[nbr_i] and fits[nbr_i] <= fits[curr_i]:
+                visited[nbr_i] = True
+                queue[tail] = nbr_i
+                tail += 1
+    # the basin does not include the starting architecture itself
+    return queue[1:tail]
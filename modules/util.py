@@ -1,8 +1,11 @@
+import os
 import numpy as np
 import pandas as pd
-from copy import deepcopy
 from config.Edge import Edge
 
+# the full NATS-Bench edge set, shared as the default edge choice everywhere
+ALL_EDGES = frozenset({Edge.NONE, Edge.CONV_1X1, Edge.CONV_3X3, Edge.SKIP_CONNECT, Edge.AVG_POOL_3X3})
+
 def str2lists(arch_str):
     """
     Shows how to read the string-based architecture encoding.
@@ -74,6 +77,9 @@ def str2edges(arch_str):
             edges.append(arch[i][j][0])
     return edges
 
+# bind the template's format method once so each call is a single format op
+_edges_template = "|{}~0|+|{}~0|{}~1|+|{}~0|{}~1|{}~2|".format
+
 def edges2str(edges):
     """
     Returns the string representation of the architecture given a list of edges.
@@ -84,10 +90,7 @@ def edges2str(edges):
     Returns:
         (String): string representation of the architecture
     """
-    first_node = f"|{edges[0]}~0|"
-    second_node = f"|{edges[1]}~0|{edges[2]}~1|"
-    third_node = f"|{edges[3]}~0|{edges[4]}~1|{edges[5]}~2|"
-    return f"{first_node}+{second_node}+{third_node}"
+    return _edges_template(*edges)
 
 def edit_distance(arch1_str, arch2_str):
     """
@@ -109,7 +112,7 @@ def edit_distance(arch1_str, arch2_str):
             edit_distance += 1
     return edit_distance
 
-def nbr_strings(arch_str, edges={Edge.NONE, Edge.CONV_1X1, Edge.CONV_3X3, Edge.SKIP_CONNECT, Edge.AVG_POOL_3X3}):
+def nbr_strings(arch_str, edges=ALL_EDGES):
     """
     Returns list of architectures strings that are one edge changed from the input architecture string.
 
@@ -120,23 +123,22 @@ def nbr_strings(arch_str, edges={Edge.NONE, Edge.CONV_1X1, Edge.CONV_3X3, Edge.S
     Returns:
         (set of Strings): set of strings representations of architecture that are one edge different from the input architecture (including edge removal)
     """
-    arch = str2lists(arch_str)
+    arch_edges = str2edges(arch_str)
     nbrs = set()
-    # iterate through each non-input node
-    for i in range(len(arch)):
-        # iterate through the incoming edges
-        for j in range(i+1):
-            # iterate through each edge possibility
-            for edge in edges:
-                # only adds the new architecture to the neighborhood if it is different
-                # from the old architecture
-                if arch[i][j][0] != edge:
-                    nbr = deepcopy(arch)
-                    nbr[i][j][0] = edge
-                    nbrs.add(lists2str(nbr))
+    # iterate through the edge slots
+    for slot in range(len(arch_edges)):
+        old_edge = arch_edges[slot]
+        # iterate through each edge possibility
+        for edge in edges:
+            # only adds the new architecture to the neighborhood if it is different
+            # from the old architecture
+            if edge != old_edge:
+                arch_edges[slot] = edge
+                nbrs.add(edges2str(arch_edges))
+        arch_edges[slot] = old_edge
     return nbrs
 
-def nbrs(arch_strs, arch_i, edges={Edge.NONE, Edge.CONV_1X1, Edge.CONV_3X3, Edge.SKIP_CONNECT, Edge.AVG_POOL_3X3}):
+def nbrs(arch_strs, arch_i, edges=ALL_EDGES):
     """
     Returns list of indices that correspond with neighbors of the architecture at index arch_i
 
@@ -149,7 +151,97 @@ def nbrs(arch_strs, arch_i, edges={Edge.NONE, Edge.CONV_1X1, Edge.CONV_3X3, Edge
         (list of ints): corresponding indices of neighbor architectures
     """
     nbr_strs = nbr_strings(arch_strs[arch_i], edges=edges)
-    return [arch_strs.index(nbr_str) for nbr_str in nbr_strs]
+    # resolve neighbors through a map built once instead of a linear scan per neighbor
+    arch_to_i = {arch_str: i for i, arch_str in enumerate(arch_strs)}
+    return [arch_to_i[nbr_str] for nbr_str in nbr_strs]
+
+def pearson(a, b):
+    """
+    Returns the Pearson correlation coefficient of two sequences, computed with
+    the direct dot-product formula so tight loops avoid the temporary matrices
+    and p-value machinery of the scipy/numpy correlation routines.
+
+    Parameters:
+        a (array-like): first sequence of values
+        b (array-like): second sequence of values
+
+    Returns:
+        (float): Pearson correlation coefficient between a and b
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    a = a - a.mean()
+    b = b - b.mean()
+    return float(np.dot(a, b) / np.sqrt(np.dot(a, a) * np.dot(b, b)))
+
+def encode_edges(arch_strs, edges=ALL_EDGES):
+    """
+    Encodes architecture strings as a matrix of integer edge codes, one row per
+    architecture and one column per edge slot, so distance computations can be
+    done on small integer arrays instead of strings.
+
+    Parameters:
+        arch_strs (list of Strings): architecture strings corresponding to architecture indices
+        edges (set of Strings): set of edges to choose from
+
+    Returns:
+        (numpy.ndarray): int8 array of shape (num architectures, num slots) of edge codes
+    """
+    edge_to_code = {edge: code for code, edge in enumerate(sorted(edges))}
+    num_slots = len(str2edges(arch_strs[0]))
+    codes = np.empty((len(arch_strs), num_slots), dtype=np.int8)
+    for i, arch_str in enumerate(arch_strs):
+        for slot, edge in enumerate(str2edges(arch_str)):
+            codes[i, slot] = edge_to_code[edge]
+    return codes
+
+def build_neighbor_table(arch_strs, edges=ALL_EDGES, cache_path=None):
+    """
+    Builds a table of neighbor indices for every architecture in the search space.
+    Row i holds the indices of all architectures one edge changed from architecture i,
+    stored contiguously so neighbor lookups are a single row load instead of
+    re-parsing strings and scanning the architecture list on every call.
+
+    Parameters:
+        arch_strs (list of Strings): architecture strings corresponding to architecture indices
+        edges (set of Strings): set of edges to choose from
+        cache_path (String, default None): if given, the table is persisted there as .npz
+            and loaded back on later calls instead of being rebuilt; the cache is only
+            reused when its shape matches the requested architectures and edges
+
+    Returns:
+        (numpy.ndarray): int32 array of shape (num architectures, num slots * (num edges - 1))
+                         where row i contains the indices of the neighbors of architecture i
+    """
+    num_cols = len(str2edges(arch_strs[0])) * (len(edges) - 1)
+    if cache_path is not None and os.path.exists(cache_path):
+        with np.load(cache_path) as cache:
+            table = cache["nbr_table"]
+        if table.shape == (len(arch_strs), num_cols):
+            return table
+    # pack each architecture's edge codes into one base-(num edges) integer, so a
+    # neighbor is found by adjusting one digit and looking the result up with
+    # searchsorted instead of formatting and hashing strings
+    codes = encode_edges(arch_strs, edges=edges)
+    num_slots = codes.shape[1]
+    base = len(edges)
+    place = base ** np.arange(num_slots, dtype=np.int64)
+    packed = codes.astype(np.int64) @ place
+    order = np.argsort(packed)
+    sorted_packed = packed[order]
+    table = np.empty((len(arch_strs), num_cols), dtype=np.int32)
+    for slot in range(num_slots):
+        # candidate packed codes with this slot set to every edge, own edge included
+        cand = packed[:, None] + (np.arange(base)[None, :] - codes[:, slot:slot + 1]) * place[slot]
+        pos = np.minimum(np.searchsorted(sorted_packed, cand), len(arch_strs) - 1)
+        # every candidate must be present when arch_strs covers the full search space
+        assert (sorted_packed[pos] == cand).all()
+        # drop the column matching each row's own edge, keeping the edge-code order
+        keep = np.arange(base)[None, :] != codes[:, slot:slot + 1]
+        table[:, slot * (base - 1):(slot + 1) * (base - 1)] = order[pos][keep].reshape(len(arch_strs), base - 1)
+    if cache_path is not None:
+        np.savez(cache_path, nbr_table=table)
+    return table
 
 def dists_to_arch(arch_strs, arch_i):
     """
@@ -161,4 +253,7 @@ def dists_to_arch(arch_strs, arch_i):
     Returns:
         (numpy.ndarray): distances of all architectures to given architecture, by index
     """
-    return [edit_distance(arch_str, arch_strs[arch_i]) for arch_str in arch_strs]
\ No newline at end of file
+    # the edit distance between architectures is the Hamming distance over edge codes,
+    # so encode once and compare whole rows against the reference architecture
+    codes = encode_edges(arch_strs)
+    return (codes != codes[arch_i]).sum(axis=1)
\ No newline at end of file
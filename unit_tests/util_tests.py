@@ -6,8 +6,12 @@ sys.path.append("..")
 from modules import util
 
 EDGES = ["none", "nor_conv_1x1", "nor_conv_3x3", "skip_connect", "avg_pool_3x3"]
-df = pd.read_csv("../nats_bench.csv")
+# only the architecture strings are needed; skip parsing the accuracy columns
+df = pd.read_csv("../nats_bench.csv", usecols=["ArchitectureString"])
 arch_strs = list(df["ArchitectureString"])
+# map architecture strings to their indices once instead of filtering the
+# DataFrame for every expected neighbor
+arch_to_i = {arch_str: i for i, arch_str in enumerate(arch_strs)}
 class TestList2Str(unittest.TestCase):
     def test_list2str1(self):
         s = "|nor_conv_1x1~0|+|none~0|none~1|+|none~0|none~1|skip_connect~2|"
@@ -53,9 +57,13 @@ class TestList2Str(unittest.TestCase):
                     nbr = deepcopy(s_edges)
                     nbr[i] = new_edge
                     nbr_str = util.edges2str(nbr)
-                    nbr_i = df[df["ArchitectureString"] == nbr_str].index[0]
-                    nbrs_test.add(nbr_i)
+                    nbrs_test.add(arch_to_i[nbr_str])
         self.assertEqual(nbrs_test, set(nbrs))
 
+    def test_dists_to_arch1(self):
+        dists = util.dists_to_arch(arch_strs[:50], 0)
+        for i in range(50):
+            self.assertEqual(dists[i], util.edit_distance(arch_strs[i], arch_strs[0]))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file